@@ -1,13 +1,27 @@
 #!/usr/bin/python3
 import asyncio
-import json
+import contextlib
 import logging
+import queue
+import random
 from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Any
 
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+try:
+    import uvloop
+except ImportError:  # e.g. on Windows
+    uvloop = None
+
 from bleak import BleakScanner
 from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
 from eq3btsmart.thermostat import (
     Eq3CommandException,
     Eq3ConnectionException,
@@ -17,10 +31,20 @@ from eq3btsmart.thermostat import (
 )
 
 POLL_INTERVAL_SECONDS = 60
+BACKOFF_BASE = 1.3
+MAX_BACKOFF = 900
+RECONNECT_INTERVAL_SECONDS = 6 * 60 * 60
+DISCOVERY_TIMEOUT_SECONDS = 10.0
+POLL_TIMEOUT_SECONDS = 30.0
 DATA_FILE = Path(__file__).parent / "data.json"
+STATUS_FMT = (
+    "%s (%s) [%s]: %.1f°C Ziel, Ventil %d%%, Modus %s, Fenster=%s, Boost=%s, Batterie_niedrig=%s"
+)
+
+LOGGER = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ThermostatConfig:
     id: str
     room_name: str
@@ -29,16 +53,40 @@ class ThermostatConfig:
     is_dummy: bool
 
 
+_CONFIG_CACHE: tuple[int, list[ThermostatConfig]] | None = None
+
+
 def load_thermostats() -> list[ThermostatConfig]:
-    with DATA_FILE.open() as fp:
-        data: dict[str, Any] = json.load(fp)
+    """Parse DATA_FILE; the result is cached until the file's mtime changes."""
+    global _CONFIG_CACHE
+
+    mtime = DATA_FILE.stat().st_mtime_ns
+    if _CONFIG_CACHE and _CONFIG_CACHE[0] == mtime:
+        return _CONFIG_CACHE[1]
+
+    # both orjson and the stdlib json accept bytes
+    data: dict[str, Any] = _json.loads(DATA_FILE.read_bytes())
 
-    rooms_by_id = {room["id"]: room["name"] for room in data.get("rooms", [])}
+    # rooms without id or name are skipped instead of raising KeyError; for duplicate ids the first wins
+    rooms_by_id: dict[str, str] = {}
+    for room in data.get("rooms", ()):
+        if not ((room_id := room.get("id")) and (name := room.get("name"))):
+            continue
+        if room_id in rooms_by_id:
+            LOGGER.warning(
+                "Doppelte Raum-ID %s in %s – %s ignoriert, behalte %s",
+                room_id,
+                DATA_FILE,
+                name,
+                rooms_by_id[room_id],
+            )
+            continue
+        rooms_by_id[room_id] = name
     thermostats: list[ThermostatConfig] = []
 
-    for entry in data.get("thermostats", []):
-        address = entry.get("address", "")
-        is_dummy = address.upper().endswith("XX:XX:XX")
+    for entry in data.get("thermostats", ()):
+        address = entry.get("address", "").upper()
+        is_dummy = address.endswith("XX:XX:XX")
         thermostats.append(
             ThermostatConfig(
                 id=entry.get("id", ""),
@@ -49,102 +97,270 @@ def load_thermostats() -> list[ThermostatConfig]:
             )
         )
 
+    _CONFIG_CACHE = (mtime, thermostats)
     return thermostats
 
 
-async def resolve_ble_device(config: ThermostatConfig, timeout: float = 10.0) -> BLEDevice:
-    """Find a BLEDevice for the configured address using BleakScanner (as in basic usage docs)."""
-    device = await BleakScanner.find_device_by_address(config.address, timeout=timeout)
+_DISCOVERY_LOCK = asyncio.Lock()
+# bumped after every rediscovery scan so waiting tasks can tell a scan already ran for them
+_discovery_generation = 0
+# only one GATT transaction on the shared adapter at a time
+_BLE_LOCK = asyncio.Lock()
+
+
+async def discover_all(
+    addresses: set[str], timeout: float = DISCOVERY_TIMEOUT_SECONDS
+) -> dict[str, BLEDevice]:
+    """Run a single BleakScanner pass and collect the devices for all wanted (upper-case) addresses."""
+    found: dict[str, BLEDevice] = {}
+    if not addresses:
+        return found
+    complete = asyncio.Event()
+
+    def on_detection(device: BLEDevice, _advertisement: AdvertisementData) -> None:
+        address = device.address.upper()
+        if address in addresses and address not in found:
+            found[address] = device
+            if len(found) == len(addresses):
+                complete.set()
+
+    async with BleakScanner(detection_callback=on_detection):
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(complete.wait(), timeout)
+
+    return found
+
+
+async def resolve_ble_device(
+    config: ThermostatConfig, device_map: dict[str, BLEDevice | None]
+) -> BLEDevice:
+    """Look up the BLEDevice for the configured address, rescanning for all missing devices if needed.
+
+    Concurrent lookups are coalesced: a task that waited on the lock while a scan ran reuses that
+    scan's result instead of scanning again, even if its device was not found.
+    """
+    global _discovery_generation
+
+    address = config.address
+    device = device_map.get(address)
+    if device is not None:
+        # found by the startup scan or an earlier rediscovery, no need to wait on a running scan
+        return device
+
+    generation = _discovery_generation
+    async with _DISCOVERY_LOCK:
+        if generation == _discovery_generation and device_map.get(address) is None:
+            missing = {addr for addr, dev in device_map.items() if dev is None} | {address}
+            try:
+                device_map.update(await discover_all(missing))
+            finally:
+                _discovery_generation += 1
+        device = device_map.get(address)
+
     if device is None:
         raise Eq3ConnectionException(
             f"Kein Thermostat unter Adresse {config.address} gefunden"
         )
-    return BLEDevice(address=device.address, name=config.label, details=device.details)
+    return device
+
+
+def backoff_delay(failure_count: int) -> float:
+    """Exponential backoff with jitter after consecutive failed polls, capped at MAX_BACKOFF."""
+    delay = min(MAX_BACKOFF, POLL_INTERVAL_SECONDS * (BACKOFF_BASE ** failure_count))
+    return delay * (1 + random.uniform(0, 0.5))
+
+
+async def disconnect_thermostat(config: ThermostatConfig, thermostat: Thermostat | None) -> None:
+    """Best-effort disconnect bounded by POLL_TIMEOUT_SECONDS; errors are logged and swallowed."""
+    try:
+        if thermostat and thermostat.is_connected:
+            async with asyncio.timeout(POLL_TIMEOUT_SECONDS):
+                await thermostat.async_disconnect()
+    except TimeoutError:
+        LOGGER.warning(
+            "Trennen von %s (%s) nach %.0f s abgebrochen",
+            config.label,
+            config.address,
+            POLL_TIMEOUT_SECONDS,
+        )
+    except EOFError:
+        LOGGER.warning(
+            "EOFError beim Trennen von %s (%s) – ignoriert",
+            config.label,
+            config.address,
+        )
+    except Exception:
+        LOGGER.exception(
+            "Verbindung zu %s (%s) konnte nicht sauber getrennt werden",
+            config.label,
+            config.address,
+        )
+
+
+@dataclass(slots=True)
+class PollState:
+    config: ThermostatConfig
+    thermostat: Thermostat | None = None
+    connected_at: float = 0.0
+    failure_count: int = 0
+    next_poll: float = 0.0
 
 
-async def poll_thermostat(config: ThermostatConfig) -> None:
+async def poll_once(
+    state: PollState, device_map: dict[str, BLEDevice | None], delay: float = 0.0
+) -> None:
+    """Read one status after ``delay`` seconds, keeping the connection open for the next tick."""
+    await asyncio.sleep(delay)
+
+    config = state.config
     if config.is_dummy:
-        while True:
-            logging.info(
-                "Dummy-Thermostat %s (%s) in Raum %s – uebersprungen",
+        LOGGER.info(
+            "Dummy-Thermostat %s (%s) in Raum %s – uebersprungen",
+            config.label,
+            config.address,
+            config.room_name,
+        )
+        return
+
+    loop = asyncio.get_running_loop()
+    try:
+        if state.thermostat and not state.thermostat.is_connected:
+            # link dropped between ticks (thermostat or BlueZ); reconnect without counting a failure
+            LOGGER.info(
+                "Verbindung zu %s (%s) getrennt – verbinde neu",
                 config.label,
                 config.address,
-                config.room_name,
             )
-            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+            state.thermostat = None
 
-    device: BLEDevice | None = None
+        if state.thermostat and loop.time() - state.connected_at >= RECONNECT_INTERVAL_SECONDS:
+            # refresh long-lived GATT sessions before they go stale
+            await disconnect_thermostat(config, state.thermostat)
+            state.thermostat = None
 
-    while True:
-        thermostat: Thermostat | None = None
-        try:
-            if device is None:
-                device = await resolve_ble_device(config)
+        # resolve outside the BLE lock so connected devices don't wait behind a rediscovery scan
+        device: BLEDevice | None = None
+        if state.thermostat is None:
+            device = await resolve_ble_device(config, device_map)
 
-            thermostat = Thermostat(device)
-            await thermostat.async_connect()
-            status = await thermostat.async_get_status()
-            logging.info(
-                "%s (%s) [%s]: %.1f°C Ziel, Ventil %d%%, Modus %s, Fenster=%s, Boost=%s, Batterie_niedrig=%s",
+        # the timeout starts once the lock is held, so waiting behind other devices doesn't count
+        async with _BLE_LOCK, asyncio.timeout(POLL_TIMEOUT_SECONDS):
+            if device is not None:
+                state.thermostat = Thermostat(device)
+                await state.thermostat.async_connect()
+                state.connected_at = loop.time()
+
+            status = await state.thermostat.async_get_status()
+        if LOGGER.isEnabledFor(logging.INFO):
+            mode_name = status.operation_mode.name
+            LOGGER.info(
+                STATUS_FMT,
                 config.label,
                 config.address,
                 config.room_name,
                 status.target_temperature,
                 status.valve,
-                status.operation_mode.name,
+                mode_name,
                 status.is_window_open,
                 status.is_boost,
                 status.is_low_battery,
             )
-        except (Eq3ConnectionException, Eq3TimeoutException, Eq3CommandException, Eq3StateException) as ex:
-            logging.error(
-                "Thermostat %s (%s) konnte nicht abgefragt werden: %s",
-                config.label,
-                config.address,
-                ex,
-            )
-            device = None  # rediscover next loop
-        except Exception:
-            logging.exception(
-                "Unerwarteter Fehler beim Abfragen von %s (%s)",
-                config.label,
-                config.address,
-            )
-            device = None
-        finally:
-            try:
-                if thermostat and thermostat.is_connected:
-                    await thermostat.async_disconnect()
-            except EOFError:
-                logging.warning(
-                    "EOFError beim Trennen von %s (%s) – ignoriert",
-                    config.label,
-                    config.address,
-                )
-            except Exception:
-                logging.exception(
-                    "Verbindung zu %s (%s) konnte nicht sauber getrennt werden",
-                    config.label,
-                    config.address,
-                )
-
-        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+        state.failure_count = 0
+        state.next_poll = 0.0
+        return
+    except (Eq3ConnectionException, Eq3TimeoutException, Eq3CommandException, Eq3StateException) as ex:
+        LOGGER.error(
+            "Thermostat %s (%s) konnte nicht abgefragt werden: %s",
+            config.label,
+            config.address,
+            ex,
+        )
+    except TimeoutError:
+        LOGGER.error(
+            "Thermostat %s (%s) hat nicht innerhalb von %.0f s geantwortet",
+            config.label,
+            config.address,
+            POLL_TIMEOUT_SECONDS,
+        )
+    except Exception:
+        LOGGER.exception(
+            "Unerwarteter Fehler beim Abfragen von %s (%s)",
+            config.label,
+            config.address,
+        )
 
+    await disconnect_thermostat(config, state.thermostat)
+    state.thermostat = None
+    device_map[config.address] = None  # rediscover on the next attempt
+    state.failure_count += 1
+    state.next_poll = loop.time() + backoff_delay(state.failure_count)
 
-async def main() -> None:
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s %(levelname)s %(message)s",
-    )
 
+def setup_logging() -> QueueListener:
+    """Log through a queue so the blocking stream writes happen off the event-loop thread."""
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+async def poll_all() -> None:
     configs = load_thermostats()
     if not configs:
-        logging.error("Keine Thermostate in %s gefunden", DATA_FILE)
+        LOGGER.error("Keine Thermostate in %s gefunden", DATA_FILE)
         return
 
-    tasks = [asyncio.create_task(poll_thermostat(cfg)) for cfg in configs]
-    await asyncio.gather(*tasks)
+    addresses = {cfg.address for cfg in configs if not cfg.is_dummy}
+    device_map: dict[str, BLEDevice | None] = dict.fromkeys(addresses)
+    try:
+        device_map.update(await discover_all(addresses))
+    except Exception:
+        LOGGER.exception("BLE-Suche beim Start fehlgeschlagen")
+
+    # one shared timer for all thermostats; devices in backoff sit out ticks until they are due
+    # and then run at their own next_poll offset within the tick, keeping the backoff jitter
+    loop = asyncio.get_running_loop()
+    # spread the first polls over one interval so the devices don't all hit the adapter at once
+    stagger = POLL_INTERVAL_SECONDS / len(configs)
+    start = loop.time()
+    states = [PollState(cfg, next_poll=start + i * stagger) for i, cfg in enumerate(configs)]
+    try:
+        while True:
+            tick_start = loop.time()
+            async with asyncio.TaskGroup() as tg:
+                for state in states:
+                    if state.next_poll < tick_start + POLL_INTERVAL_SECONDS:
+                        delay = max(0.0, state.next_poll - tick_start)
+                        tg.create_task(poll_once(state, device_map, delay))
+
+            # keep a fixed cadence: time spent polling comes out of the interval
+            await asyncio.sleep(max(0.0, tick_start + POLL_INTERVAL_SECONDS - loop.time()))
+    finally:
+        for state in states:
+            await disconnect_thermostat(state.config, state.thermostat)
+
+
+async def main() -> None:
+    listener = setup_logging()
+    try:
+        await poll_all()
+    finally:
+        listener.stop()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    # Ctrl+C cancels main(); running polls are cancelled and all thermostats disconnected on the way out
+    with contextlib.suppress(KeyboardInterrupt), asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())